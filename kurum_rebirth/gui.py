@@ -119,8 +119,9 @@ class GUISyncServiceHandler(SyncServiceHandler):
     def on_backup_start(self, config: SyncConfig):
         self.window.write_event_value('-SHOW_NOTIFICATION-', Notification(title="KurumRebirth", message=f"Backup start: {config.name}"))
 
-    def on_backup_end(self, config: SyncConfig):
-        self.window.write_event_value('-SHOW_NOTIFICATION-', Notification(title="KurumRebirth", message=f"Backup finished: {config.name}"))
+    def on_backup_end(self, config: SyncConfig, changed: bool):
+        message = f"Backup finished: {config.name}" if changed else f"Backup unchanged, nothing uploaded: {config.name}"
+        self.window.write_event_value('-SHOW_NOTIFICATION-', Notification(title="KurumRebirth", message=message))
 
     def on_restore_start(self, config: SyncConfig):
         self.window.write_event_value('-SHOW_NOTIFICATION-', Notification(title="KurumRebirth", message=f"Restore start: {config.name}"))
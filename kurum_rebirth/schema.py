@@ -1,17 +1,25 @@
 import typing as t
-from pathlib import Path
 
 from pydantic import BaseModel
-from pydantic_yaml import parse_yaml_raw_as, to_yaml_str
+
+from kurum_rebirth.state import get_state_store
 
 
 class DropboxConfig(BaseModel):
     refresh_token: str = None
 
 
+class ThrottleConfig(BaseModel):
+    enabled: bool = True
+    # Re-checked while a job runs. On Linux, CPU priority is only raised back when the job ends (I/O priority follows).
+    lower_priority: bool = True
+    bandwidth_limit_kib_per_sec: t.Optional[int] = 1024
+
+
 class KurumConfig(BaseModel):
     active_storage: t.Optional[t.Literal['dropbox']] = None
     dropbox: DropboxConfig = DropboxConfig()
+    throttle: ThrottleConfig = ThrottleConfig()
 
 
 class BackupTask(BaseModel):
@@ -49,6 +57,23 @@ class PlatformSyncOptions(BaseModel):
     restore_tasks: list[RestoreTask] = []
 
 
+class ArchiveMember(BaseModel):
+    path: str
+    data_offset: int
+    compressed_size: int
+    size: int
+    compress_type: int
+    crc: int
+    sha256: str
+
+
+class ArchiveIndex(BaseModel):
+    kurum_version: int = 1
+    archive_size: int
+    archive_content_hash: t.Optional[str] = None
+    members: list[ArchiveMember] = []
+
+
 class SyncConfig(BaseModel):
     _key: str
     name: str
@@ -63,32 +88,8 @@ class SyncConfig(BaseModel):
 
         return
 
-    def read_user_settings(self):
-        config_path = Path(f"user_settings/{self._key}.yaml")
-
-        config_path.parent.mkdir(exist_ok=True)
-
-        if config_path.exists():
-            with config_path.open("r", encoding='utf-8') as f:
-                return parse_yaml_raw_as(SyncUserSetting, f.read())
-
-        return SyncUserSetting()
-
-
-    def write_user_settings(self, new_config: SyncUserSetting):
-        config_path = Path(f"user_settings/{self._key}.yaml")
-
-        config_path.parent.mkdir(exist_ok=True)
-
-        with config_path.open("w", encoding='utf-8') as f:
-            f.write(to_yaml_str(new_config))
-
     def set_user_setting(self, name: str, value):
-        config = self.read_user_settings()
-        config.values[name] = value
-        self.write_user_settings(config)
+        get_state_store().set_user_setting(self._key, name, value)
 
     def get_user_setting(self, name: str, default_value = None):
-        config = self.read_user_settings()
-        return config.values.get(name, default_value)
-
+        return get_state_store().get_user_setting(self._key, name, default_value)
@@ -0,0 +1,118 @@
+import hashlib
+import struct
+import zlib
+from fnmatch import fnmatch
+from pathlib import Path
+from zipfile import ZipFile, ZipInfo, ZIP_STORED, ZIP_DEFLATED, sizeFileHeader, structFileHeader
+
+from kurum_rebirth.error import KurumError
+from kurum_rebirth.schema import ArchiveIndex, ArchiveMember
+
+
+# Field positions in the zip local file header.
+_FH_FILENAME_LENGTH = 10
+_FH_EXTRA_FIELD_LENGTH = 11
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def normalize_member_path(name: str) -> str:
+    return name.replace("\\", "/").lstrip("/")
+
+
+def write_member(f: ZipFile, path: Path, arcname: str) -> tuple[str, str | None]:
+    # Same as ZipFile.write, but hashes the bytes while they are read for packing.
+    # Returns (member name, sha256), with no hash for directories.
+    if path.is_dir():
+        f.write(str(path), arcname=arcname)
+        return arcname, None
+
+    info = ZipInfo.from_file(str(path), arcname=arcname)
+    info.compress_type = f.compression
+
+    digest = hashlib.sha256()
+
+    with path.open('rb') as src, f.open(info, 'w') as dst:
+        while chunk := src.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+            dst.write(chunk)
+
+    return info.filename, digest.hexdigest()
+
+
+def build_archive_index(zip_path: Path, member_hashes: dict[str, str] | None = None) -> ArchiveIndex:
+    # member_hashes (from write_member) avoids decompressing the archive again to hash its members.
+    member_hashes = member_hashes or {}
+    members = []
+
+    with zip_path.open('rb') as raw, ZipFile(raw, 'r') as f:
+        for info in f.infolist():
+            if info.is_dir():
+                continue
+
+            # The local header may carry a different extra field than the central directory,
+            # so read it to find where the member data actually starts.
+            raw.seek(info.header_offset)
+            header = struct.unpack(structFileHeader, raw.read(sizeFileHeader))
+            data_offset = (info.header_offset + sizeFileHeader
+                           + header[_FH_FILENAME_LENGTH] + header[_FH_EXTRA_FIELD_LENGTH])
+
+            sha256 = member_hashes.get(info.filename)
+
+            if sha256 is None:
+                digest = hashlib.sha256()
+                with f.open(info) as member:
+                    while chunk := member.read(HASH_CHUNK_SIZE):
+                        digest.update(chunk)
+
+                sha256 = digest.hexdigest()
+
+            members.append(ArchiveMember(
+                path=normalize_member_path(info.filename),
+                data_offset=data_offset,
+                compressed_size=info.compress_size,
+                size=info.file_size,
+                compress_type=info.compress_type,
+                crc=info.CRC,
+                sha256=sha256,
+            ))
+
+    return ArchiveIndex(archive_size=zip_path.stat().st_size, members=members)
+
+
+def match_path(path: str, patterns: list[str]) -> bool:
+    for pattern in patterns:
+        pattern = normalize_member_path(pattern)
+
+        if path == pattern or path.startswith(f"{pattern.rstrip('/')}/") or fnmatch(path, pattern):
+            return True
+
+    return False
+
+
+def match_members(members: list[ArchiveMember], patterns: list[str]) -> list[ArchiveMember]:
+    return [member for member in members if match_path(member.path, patterns)]
+
+
+def decode_member(member: ArchiveMember, data: bytes) -> bytes:
+    if member.compress_type == ZIP_STORED:
+        content = data
+    elif member.compress_type == ZIP_DEFLATED:
+        content = zlib.decompressobj(-zlib.MAX_WBITS).decompress(data)
+    else:
+        raise KurumError(f"Unsupported compression for partial restore: {member.path}")
+
+    if hashlib.sha256(content).hexdigest() != member.sha256:
+        raise KurumError(f"Hash mismatch: {member.path}")
+
+    return content
+
+
+def get_extract_path(root: Path, member_path: str) -> Path:
+    root = root.resolve()
+    path = (root / member_path).resolve()
+
+    if not path.is_relative_to(root):
+        raise KurumError(f"Refusing to extract outside of {root}: {member_path}")
+
+    return path
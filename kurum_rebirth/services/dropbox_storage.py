@@ -1,13 +1,19 @@
+import hashlib
 import logging
+import os
+import typing as t
 import webbrowser
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import pendulum
+import requests
 
 import PySimpleGUI as sg
 
 from dropbox import DropboxOAuth2FlowNoRedirect, Dropbox
 from dropbox.exceptions import ApiError
-from dropbox.files import GetMetadataError, FileMetadata, WriteMode
+from dropbox.files import CommitInfo, GetMetadataError, FileMetadata, UploadSessionCursor, WriteMode
 
 from kurum_rebirth.services.storage import Storage
 from kurum_rebirth.config import get_config, save_config
@@ -17,6 +23,92 @@ from kurum_rebirth.vendor import DROPBOX_APP_KEY
 
 logger = logging.getLogger(__name__)
 
+# Dropbox content_hash block size.
+# https://www.dropbox.com/developers/reference/content-hash
+CONTENT_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+TRANSFER_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Ranges closer than this are fetched in one request; re-downloading the gap is cheaper than a round trip.
+RANGE_MERGE_GAP = 256 * 1024
+
+
+def _hash_block(block: bytes) -> bytes:
+    return hashlib.sha256(block).digest()
+
+
+def compute_content_hash(path: str, max_workers: int = 4) -> str:
+    block_hashes = []
+    pending = deque()
+
+    # hashlib releases the GIL on large buffers, so blocks are hashed in parallel threads.
+    # Only max_workers blocks are kept in memory at once.
+    with open(path, 'rb') as f, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while block := f.read(CONTENT_HASH_BLOCK_SIZE):
+            pending.append(executor.submit(_hash_block, block))
+
+            if len(pending) >= max_workers:
+                block_hashes.append(pending.popleft().result())
+
+        while pending:
+            block_hashes.append(pending.popleft().result())
+
+    return hashlib.sha256(b"".join(block_hashes)).hexdigest()
+
+
+def coalesce_ranges(ranges: list[tuple[int, int]], max_gap: int = RANGE_MERGE_GAP):
+    # Yields (start, end, indices) spans covering the (offset, length) ranges, merging nearby ones.
+    order = sorted((i for i, (_, length) in enumerate(ranges) if length > 0), key=lambda i: ranges[i][0])
+
+    span = None
+
+    for i in order:
+        offset, length = ranges[i]
+
+        if span and offset <= span[1] + max_gap:
+            span[1] = max(span[1], offset + length)
+            span[2].append(i)
+        else:
+            if span:
+                yield tuple(span)
+
+            span = [offset, offset + length, [i]]
+
+    if span:
+        yield tuple(span)
+
+
+def split_span(chunks: t.Iterable[bytes], start: int, members: list[tuple[int, int, int]]):
+    # Yields (index, bytes) for each (index, offset, length) member, ascending by offset, as soon as
+    # it is complete. Only the member being assembled is buffered, not the whole span.
+    buffer = bytearray()
+    buffer_offset = start
+
+    members = iter(members)
+    current = next(members, None)
+
+    for chunk in chunks:
+        buffer += chunk
+
+        while current:
+            i, offset, length = current
+
+            if buffer_offset + len(buffer) < offset + length:
+                break
+
+            yield i, bytes(buffer[offset - buffer_offset:offset - buffer_offset + length])
+            current = next(members, None)
+
+        keep_from = current[1] if current else buffer_offset + len(buffer)
+        drop = min(keep_from - buffer_offset, len(buffer))
+
+        if drop > 0:
+            del buffer[:drop]
+            buffer_offset += drop
+
+    if current:
+        raise KurumError("Range response ended early")
+
 
 class DropboxStorage(Storage):
     def init(self):
@@ -80,12 +172,111 @@ class DropboxStorage(Storage):
 
         window.close()
 
-    def upload(self, str_path: str, to_path: str):
+    def upload(self, str_path: str, to_path: str, content_hash: str | None = None) -> bool:
+        if self._is_remote_identical(str_path, to_path, content_hash):
+            logger.info(f"Remote file is identical, skipping upload: {to_path}")
+            return False
+
         with open(str_path, 'rb') as f:
-            self.dropbox.files_upload(f.read(), to_path, mode=WriteMode.overwrite)
+            chunk = f.read(TRANSFER_CHUNK_SIZE)
+            self.bandwidth_limiter.consume(len(chunk))
+
+            next_chunk = f.read(TRANSFER_CHUNK_SIZE)
+
+            if not next_chunk:
+                self.dropbox.files_upload(chunk, to_path, mode=WriteMode.overwrite)
+                return True
+
+            # Upload in chunks so the bandwidth limiter can pace the transfer.
+            session = self.dropbox.files_upload_session_start(chunk)
+            cursor = UploadSessionCursor(session_id=session.session_id, offset=len(chunk))
+
+            while chunk := next_chunk:
+                self.bandwidth_limiter.consume(len(chunk))
+                next_chunk = f.read(TRANSFER_CHUNK_SIZE)
+
+                if next_chunk:
+                    self.dropbox.files_upload_session_append_v2(chunk, cursor)
+                    cursor.offset += len(chunk)
+                else:
+                    self.dropbox.files_upload_session_finish(
+                        chunk, cursor, CommitInfo(path=to_path, mode=WriteMode.overwrite),
+                    )
+
+        return True
+
+    def _is_remote_identical(self, str_path: str, to_path: str, local_content_hash: str | None) -> bool:
+        info = self.get_remote_file_info(to_path)
+
+        if info is None:
+            return False
+
+        size, content_hash = info
+
+        if not content_hash or size != os.path.getsize(str_path):
+            return False
+
+        return (local_content_hash or self.compute_content_hash(str_path)) == content_hash
+
+    def compute_content_hash(self, local_path: str) -> str | None:
+        return compute_content_hash(local_path)
+
+    def get_remote_file_info(self, path: str) -> tuple[int, str | None] | None:
+        try:
+            meta = self.dropbox.files_get_metadata(path)
+        except ApiError:
+            return None
+
+        if not isinstance(meta, FileMetadata):
+            return None
+
+        return meta.size, meta.content_hash
 
     def download(self, from_path: str, to_path: str):
-        self.dropbox.files_download_to_file(to_path, from_path)
+        _, response = self.dropbox.files_download(from_path)
+
+        with response, open(to_path, 'wb') as f:
+            for chunk in self._throttled_chunks(response):
+                f.write(chunk)
+
+    def _throttled_chunks(self, response: requests.Response) -> t.Iterator[bytes]:
+        # Charge the limiter as each chunk arrives, so the transfer itself is paced rather than preceded by a wait.
+        for chunk in response.iter_content(TRANSFER_CHUNK_SIZE):
+            self.bandwidth_limiter.consume(len(chunk))
+            yield chunk
+
+    def download_ranges(self, from_path: str, ranges: list[tuple[int, int]]) -> t.Iterator[tuple[int, bytes]]:
+        # Temporary links are served over plain HTTP and honor Range requests.
+        link = self.dropbox.files_get_temporary_link(from_path).link
+
+        for i, (_, length) in enumerate(ranges):
+            if length == 0:
+                yield i, b""
+
+        with requests.Session() as session:
+            for start, end, members in coalesce_ranges(ranges):
+                headers = {'Range': f"bytes={start}-{end - 1}"}
+
+                with session.get(link, headers=headers, stream=True) as response:
+                    response.raise_for_status()
+
+                    if response.status_code != 206:
+                        raise KurumError(f"Range request not honored: {from_path}")
+
+                    yield from split_span(
+                        self._throttled_chunks(response), start,
+                        [(i, *ranges[i]) for i in members],
+                    )
+
+    def exists(self, path: str) -> bool:
+        try:
+            self.dropbox.files_get_metadata(path)
+            return True
+        except ApiError as e:
+            if isinstance(e.error, GetMetadataError):
+                return False
+
+            raise KurumError
 
     def get_remote_last_sync(self, key: str) -> int:
         try:
@@ -0,0 +1,165 @@
+import logging
+import platform
+import threading
+import time
+import typing as t
+
+import psutil
+
+from kurum_rebirth.config import get_config
+from kurum_rebirth.const import POLL_INTERVAL_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+THROTTLED_NICE = 10
+
+
+class BandwidthLimiter:
+    def __init__(self):
+        # Returns the current cap in bytes per second, or None for unlimited.
+        self.rate_callback: t.Callable[[], int | None] = lambda: None
+
+        self._lock = threading.Lock()
+        self._allowance = 0.0
+        self._last = time.monotonic()
+
+    def consume(self, size: int):
+        rate = self.rate_callback()
+
+        if not rate:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            # Allow at most one second of burst.
+            self._allowance = min(rate, self._allowance + (now - self._last) * rate) - size
+            self._last = now
+
+            delay = -self._allowance / rate if self._allowance < 0 else 0
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ResourceGovernor:
+    def __init__(self, watched_process_names: t.Callable[[], t.Iterable[str]]):
+        self.watched_process_names = watched_process_names
+        self.busy = False
+
+        self._last_refresh = 0.0
+        self._job_thread_id: int | None = None
+        self._lowered = False
+        self._original_priority = None
+
+    def update(self, process_names: t.Iterable[str]):
+        watched = set(self.watched_process_names())
+        busy = any(process_name in watched for process_name in process_names)
+
+        if busy != self.busy:
+            logger.info("Watched process running, throttling sync." if busy else "Idle, sync at full speed.")
+
+        self.busy = busy
+        self._last_refresh = time.monotonic()
+
+        self._apply_priority()
+
+    def refresh(self):
+        # Cheap enough to call per chunk or per file; only rescans processes once per poll interval.
+        if time.monotonic() - self._last_refresh < POLL_INTERVAL_SECONDS:
+            return
+
+        # Runs in the middle of transfers; process_iter(['name']) swallows processes exiting or denying access.
+        self.update(process.info['name'] for process in psutil.process_iter(['name']))
+
+    @property
+    def is_throttled(self) -> bool:
+        return get_config().throttle.enabled and self.busy
+
+    def get_bandwidth_limit(self) -> int | None:
+        # Called for every transfer chunk, so a game launched mid-transfer is picked up.
+        self.refresh()
+
+        if not self.is_throttled:
+            return None
+
+        limit = get_config().throttle.bandwidth_limit_kib_per_sec
+        return limit * 1024 if limit else None
+
+    def run(self, func: t.Callable, *args):
+        throttle = get_config().throttle
+
+        if not throttle.enabled or not throttle.lower_priority:
+            return func(*args)
+
+        # Runs in a dedicated thread so priority changes only affect the sync job.
+        # refresh() re-applies the priority while the job runs, so it follows watched processes.
+        result = {}
+
+        def target():
+            self._job_thread_id = threading.get_native_id()
+
+            try:
+                self._apply_priority()
+                result['value'] = func(*args)
+            except BaseException as e:
+                result['error'] = e
+            finally:
+                if self._lowered:
+                    self._set_priority(False)
+
+                self._job_thread_id = None
+
+        thread = threading.Thread(target=target, name="kurum-sync-job")
+        thread.start()
+        thread.join()
+
+        if 'error' in result:
+            raise result['error']
+
+        return result.get('value')
+
+    def _apply_priority(self):
+        if self._job_thread_id is None or not get_config().throttle.lower_priority:
+            return
+
+        lowered = self.is_throttled
+
+        if lowered != self._lowered:
+            self._set_priority(lowered)
+
+    def _set_priority(self, lowered: bool):
+        self._lowered = lowered
+
+        try:
+            match platform.system():
+                case 'Linux':
+                    # nice and ioprio are per-thread on Linux.
+                    thread = psutil.Process(self._job_thread_id)
+
+                    if lowered:
+                        thread.nice(THROTTLED_NICE)
+                        thread.ionice(psutil.IOPRIO_CLASS_IDLE)
+                    else:
+                        thread.ionice(psutil.IOPRIO_CLASS_NONE)
+
+                        try:
+                            thread.nice(0)
+                        except psutil.AccessDenied:
+                            # Unprivileged processes cannot lower their nice value again; the job thread
+                            # keeps THROTTLED_NICE until it ends, but gets its full I/O priority back.
+                            logger.info("Cannot restore CPU priority without privileges until the sync job ends.")
+
+                case 'Windows':
+                    process = psutil.Process()
+
+                    if lowered:
+                        self._original_priority = (process.nice(), process.ionice())
+                        process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+                        process.ionice(psutil.IOPRIO_LOW)
+                    elif self._original_priority:
+                        nice, ionice = self._original_priority
+                        process.nice(nice)
+                        process.ionice(ionice)
+        except (psutil.Error, OSError) as e:
+            logger.warning(f"Failed to {'lower' if lowered else 'restore'} sync priority: {e}")
@@ -1,8 +1,14 @@
+import typing as t
 from abc import ABCMeta, abstractproperty, abstractmethod
 
+from kurum_rebirth.services.governor import BandwidthLimiter
 
 
 class Storage(metaclass=ABCMeta):
+    def __init__(self):
+        # Transfers report every chunk here so they can be throttled.
+        self.bandwidth_limiter = BandwidthLimiter()
+
     def init(self):
         pass
 
@@ -11,13 +17,35 @@ class Storage(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def upload(self, from_path: str, to_path: str):
+    def upload(self, from_path: str, to_path: str, content_hash: str | None = None) -> bool:
+        # Returns False when the remote file was already identical and nothing was sent.
+        # content_hash (from compute_content_hash) saves hashing the file again for that check.
         pass
 
     @abstractmethod
     def download(self, from_path: str, to_path: str):
         pass
 
+    @abstractmethod
+    def download_ranges(self, from_path: str, ranges: list[tuple[int, int]]) -> t.Iterator[tuple[int, bytes]]:
+        # ranges are (offset, length) pairs. Yields (index into ranges, bytes) as each range arrives,
+        # in no particular order.
+        pass
+
+    @abstractmethod
+    def exists(self, path: str) -> bool:
+        pass
+
+    @abstractmethod
+    def compute_content_hash(self, local_path: str) -> str | None:
+        # Hash of a local file in the same format get_remote_file_info reports, or None if unsupported.
+        pass
+
+    @abstractmethod
+    def get_remote_file_info(self, path: str) -> tuple[int, str | None] | None:
+        # (size, content hash) of a remote file, or None if it does not exist.
+        pass
+
     @abstractmethod
     def get_remote_last_sync(self, key: str) -> int:
         pass
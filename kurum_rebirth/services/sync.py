@@ -1,5 +1,6 @@
 import logging
 import re
+import time
 from pathlib import Path
 from collections import defaultdict
 from zipfile import ZipFile
@@ -8,9 +9,15 @@ from abc import ABCMeta, abstractmethod
 import psutil
 from pydantic_yaml import parse_yaml_raw_as
 
+from kurum_rebirth.services.archive import (
+    build_archive_index, decode_member, get_extract_path, match_members, match_path, normalize_member_path,
+    write_member,
+)
+from kurum_rebirth.services.governor import ResourceGovernor
 from kurum_rebirth.services.storage import Storage
-from kurum_rebirth.schema import SyncConfig, InitTask
+from kurum_rebirth.schema import ArchiveIndex, SyncConfig, InitTask
 from kurum_rebirth.const import DATA_ROOT
+from kurum_rebirth.state import get_state_store
 
 
 logger = logging.getLogger(__name__)
@@ -31,6 +38,9 @@ class SyncService(metaclass=ABCMeta):
         self.platform = self.get_platform()
         self.service_handler = service_handler
 
+        self.governor = ResourceGovernor(self.get_watched_process_names)
+        storage.bandwidth_limiter.rate_callback = self.governor.get_bandwidth_limit
+
         service_handler.sync_service = self
 
     @abstractmethod
@@ -57,21 +67,16 @@ class SyncService(metaclass=ABCMeta):
                 self.add_sync_config(sync_config)
 
     def get_local_last_sync(self, key: str) -> int:
-        path = Path(f"{DATA_ROOT}/last_sync/{key}")
-
-        if not path.exists():
-            return -1
-
-        with path.open() as f:
-            return int(f.read())
+        return get_state_store().get_last_sync(key)
 
     def update_local_last_sync(self, key: str, value: int):
-        path = Path(f"{DATA_ROOT}/last_sync/{key}")
+        get_state_store().set_last_sync(key, value)
 
-        path.parent.mkdir(parents=True, exist_ok=True)
-
-        with path.open('w') as f:
-            f.write(f"{value}")
+    def get_watched_process_names(self) -> list[str]:
+        return [
+            process_name for process_name, sync_configs in self.process_sync_configs.items()
+            if any(not sync_config.disabled for sync_config in sync_configs)
+        ]
 
     def check_config_init(self):
         for sync_config in self.sync_configs.values():
@@ -91,6 +96,8 @@ class SyncService(metaclass=ABCMeta):
 
         removed_processes = set(self._process_names) - set(new_process_names)
 
+        self.governor.update(new_process_names)
+
         if len(removed_processes) > 0:
             logger.info(f"Removed processes: {removed_processes}")
 
@@ -103,7 +110,7 @@ class SyncService(metaclass=ABCMeta):
                         continue
 
                     logger.info("Detected removed process: %s. Triggering %s", process_name, sync_config)
-                    self.backup(sync_config)
+                    self.governor.run(self.backup, sync_config)
 
         self._process_names = new_process_names
 
@@ -122,7 +129,7 @@ class SyncService(metaclass=ABCMeta):
             if local_last_sync >= remote_last_sync:
                 continue
 
-            self.restore(sync_config)
+            self.governor.run(self.restore, sync_config)
 
     def add_sync_config(self, sync_config: SyncConfig):
         self.sync_configs[sync_config._key] = sync_config
@@ -138,6 +145,10 @@ class SyncService(metaclass=ABCMeta):
 
         self.service_handler.on_backup_start(config)
 
+        started_at = time.time()
+        changed = False
+        size = 0
+
         for task in config.platform[self.platform].backup_tasks:
             logger.info(f"Running backup task: {task.name}")
 
@@ -149,26 +160,63 @@ class SyncService(metaclass=ABCMeta):
             temp_path.parent.mkdir(parents=True, exist_ok=True)
 
             logger.info(f"Packing...: {str(temp_path)}")
+            member_hashes = {}
             with ZipFile(str(temp_path), 'w') as f:
                 for backup_file_path in base_path.glob(task.pattern):
+                    self.governor.refresh()
                     archive_path = str(backup_file_path.absolute()).replace(str(base_path), "")
-                    f.write(str(backup_file_path.absolute()), arcname=archive_path)
+                    member_name, sha256 = write_member(f, backup_file_path.absolute(), archive_path)
+
+                    if sha256:
+                        member_hashes[member_name] = sha256
 
             upload_path = f"/backups/{config._key}/{task.name}.zip"
+            size += temp_path.stat().st_size
+
+            # Hashed once, for both the skip-identical check and the index.
+            content_hash = self.storage.compute_content_hash(str(temp_path))
 
             logger.info(f"Uploading: {upload_path}")
-            self.storage.upload(f.filename, upload_path)
-            logger.info(f"Upload finished: {upload_path}")
+            uploaded = self.storage.upload(f.filename, upload_path, content_hash=content_hash)
+
+            if uploaded:
+                changed = True
+                logger.info(f"Upload finished: {upload_path}")
+
+            index_temp_path = temp_path.with_suffix(".index.json")
+            index_upload_path = f"/backups/{config._key}/{task.name}.index.json"
+
+            remote_index = None if uploaded else self.get_archive_index(upload_path, index_upload_path, index_temp_path)
+
+            if remote_index and content_hash and remote_index.archive_content_hash == content_hash:
+                logger.info(f"Remote index is up to date: {index_upload_path}")
+            else:
+                index = build_archive_index(temp_path, member_hashes)
+                index.archive_content_hash = content_hash
+                index_temp_path.write_text(index.model_dump_json(), encoding='utf-8')
+
+                # The index only describes the zip, so uploading it alone does not bump last_sync.
+                if self.storage.upload(str(index_temp_path), index_upload_path):
+                    logger.info(f"Uploaded index: {index_upload_path}")
+
+                index_temp_path.unlink()
 
             temp_path.unlink()
             temp_path.parent.rmdir()
 
-        self.storage.update_remote_last_sync(config._key)
-        last_sync = self.storage.get_remote_last_sync(config._key)
-        self.update_local_last_sync(config._key, last_sync)
+        if changed:
+            self.storage.update_remote_last_sync(config._key)
+            last_sync = self.storage.get_remote_last_sync(config._key)
+            self.update_local_last_sync(config._key, last_sync)
+
+            logger.info(f"Backup finished: {config.name}")
+        else:
+            logger.info(f"Backup unchanged, nothing uploaded: {config.name}")
 
-        logger.info(f"Backup finished: {config.name}")
-        self.service_handler.on_backup_end(config)
+        get_state_store().add_sync_history(config._key, 'backup', started_at, time.time() - started_at, size,
+                                           changed=changed)
+
+        self.service_handler.on_backup_end(config, changed)
 
     def restore(self, config: SyncConfig):
         if not self.storage.is_authorized:
@@ -178,8 +226,12 @@ class SyncService(metaclass=ABCMeta):
 
         self.service_handler.on_restore_start(config)
 
+        started_at = time.time()
+        size = 0
+
         for task in config.platform[self.platform].restore_tasks:
             logger.info(f"Running restore task: {task.name}")
+            self.governor.refresh()
 
             temp_path = Path(f"{DATA_ROOT}/temp/restore/{config._key}/{task.name}.zip")
             temp_path.parent.mkdir(parents=True, exist_ok=True)
@@ -189,7 +241,7 @@ class SyncService(metaclass=ABCMeta):
             logger.info(f"Downloading: {source_path}")
             self.storage.download(source_path, str(temp_path))
             logger.info(f"Download finished: {source_path}")
-
+            size += temp_path.stat().st_size
 
             logger.info(f"Unpacking...: {str(temp_path)}")
             with ZipFile(str(temp_path), 'r') as f:
@@ -198,9 +250,119 @@ class SyncService(metaclass=ABCMeta):
         last_sync = self.storage.get_remote_last_sync(config._key)
         self.update_local_last_sync(config._key, last_sync)
 
+        get_state_store().add_sync_history(config._key, 'restore', started_at, time.time() - started_at, size)
+
         logger.info(f"Restored {config.name}")
         self.service_handler.on_restore_end(config)
 
+    def restore_paths(self, config: SyncConfig, paths: list[str]) -> list[Path]:
+        # Restores only the archive members matching paths (exact path, directory or glob),
+        # fetching just their byte ranges when the backup has an index.
+        if not self.storage.is_authorized:
+            logger.warning("Storage not configured.")
+
+        logger.info(f"Restoring {paths} of {config.name}")
+
+        self.service_handler.on_restore_start(config)
+
+        started_at = time.time()
+        size = 0
+        restored = []
+
+        for task in config.platform[self.platform].restore_tasks:
+            logger.info(f"Running partial restore task: {task.name}")
+
+            temp_path = Path(f"{DATA_ROOT}/temp/restore/{config._key}/{task.name}.zip")
+            temp_path.parent.mkdir(parents=True, exist_ok=True)
+
+            source_path = f"/backups/{config._key}/{task.name}.zip"
+            index_path = f"/backups/{config._key}/{task.name}.index.json"
+            extract_root = Path(self.expand_path(config, task.path))
+
+            index = self.get_archive_index(source_path, index_path, temp_path.with_suffix(".index.json"))
+
+            if index is None:
+                logger.warning(f"No usable index for {source_path}, downloading whole archive.")
+
+                self.storage.download(source_path, str(temp_path))
+                size += temp_path.stat().st_size
+
+                with ZipFile(str(temp_path), 'r') as f:
+                    for info in f.infolist():
+                        member_path = normalize_member_path(info.filename)
+
+                        if info.is_dir() or not match_path(member_path, paths):
+                            continue
+
+                        target_path = get_extract_path(extract_root, member_path)
+                        target_path.parent.mkdir(parents=True, exist_ok=True)
+                        target_path.write_bytes(f.read(info))
+
+                        logger.info(f"Restored: {target_path}")
+                        restored.append(target_path)
+
+                temp_path.unlink()
+                continue
+
+            members = match_members(index.members, paths)
+
+            if not members:
+                continue
+
+            logger.info(f"Fetching {len(members)} member(s) from {source_path}")
+            ranges = [(member.data_offset, member.compressed_size) for member in members]
+
+            # Members are written as they arrive, so only one is held in memory at a time.
+            for i, data in self.storage.download_ranges(source_path, ranges):
+                member = members[i]
+                size += len(data)
+
+                target_path = get_extract_path(extract_root, member.path)
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                target_path.write_bytes(decode_member(member, data))
+
+                logger.info(f"Restored: {target_path}")
+                restored.append(target_path)
+
+        get_state_store().add_sync_history(config._key, 'partial_restore', started_at, time.time() - started_at, size)
+
+        logger.info(f"Restored {len(restored)} file(s) of {config.name}")
+        self.service_handler.on_restore_end(config)
+
+        return restored
+
+    def get_archive_index(self, source_path: str, index_path: str, temp_path: Path) -> ArchiveIndex | None:
+        # The zip and its index are separate uploads, so only trust an index that describes the current zip.
+        if not self.storage.exists(index_path):
+            return None
+
+        self.storage.download(index_path, str(temp_path))
+
+        try:
+            index = ArchiveIndex.model_validate_json(temp_path.read_text(encoding='utf-8'))
+        except ValueError:
+            logger.warning(f"Invalid index: {index_path}")
+            return None
+        finally:
+            temp_path.unlink()
+
+        remote_info = self.storage.get_remote_file_info(source_path)
+
+        if remote_info is None:
+            return None
+
+        remote_size, remote_content_hash = remote_info
+
+        if remote_size != index.archive_size:
+            logger.warning(f"Stale index, size mismatch: {index_path}")
+            return None
+
+        if index.archive_content_hash and remote_content_hash and index.archive_content_hash != remote_content_hash:
+            logger.warning(f"Stale index, content hash mismatch: {index_path}")
+            return None
+
+        return index
+
     def expand_path(self, config: SyncConfig, path: str):
         variable_names = [(f"(@{re.escape(variable_name)})") for variable_name in config.variables]
 
@@ -230,7 +392,8 @@ class SyncServiceHandler(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def on_backup_end(self, config: SyncConfig):
+    def on_backup_end(self, config: SyncConfig, changed: bool):
+        # changed is False when nothing was uploaded because the remote backup was already identical.
         pass
 
     @abstractmethod
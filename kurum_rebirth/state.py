@@ -0,0 +1,180 @@
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+from pydantic_yaml import parse_yaml_raw_as
+
+from kurum_rebirth.const import DATA_ROOT
+
+
+logger = logging.getLogger(__name__)
+
+state_path = Path(f"{DATA_ROOT}/state.db")
+
+# Files used before the state store existed. Imported once, on first open.
+legacy_last_sync_root = Path(f"{DATA_ROOT}/last_sync")
+legacy_user_settings_root = Path("user_settings")
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS last_sync (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS user_settings (
+    config_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (config_key, name)
+);
+
+CREATE TABLE IF NOT EXISTS sync_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    config_key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    size INTEGER NOT NULL,
+    changed INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS sync_history_config_key ON sync_history (config_key, started_at);
+"""
+
+
+class StateStore:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Shared between the GUI thread and the polling thread, serialized by _lock.
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+        self._migrate()
+
+    def _migrate(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+            if version >= SCHEMA_VERSION:
+                return
+
+            self._import_legacy_files()
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _import_legacy_files(self):
+        from kurum_rebirth.schema import SyncUserSetting
+
+        if legacy_last_sync_root.is_dir():
+            for path in legacy_last_sync_root.iterdir():
+                try:
+                    value = int(path.read_text().strip())
+                except (OSError, ValueError):
+                    logger.warning(f"Skipping unreadable last_sync file: {path}")
+                    continue
+
+                logger.info(f"Importing last_sync: {path}")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO last_sync (key, value) VALUES (?, ?)",
+                    (path.name, value),
+                )
+
+        if legacy_user_settings_root.is_dir():
+            for path in legacy_user_settings_root.glob("*.yaml"):
+                try:
+                    with path.open("r", encoding='utf-8') as f:
+                        settings = parse_yaml_raw_as(SyncUserSetting, f.read())
+                except Exception as e:
+                    # YAML parse errors come from the yaml backend and do not share a base class with ValidationError.
+                    logger.warning(f"Skipping unreadable user settings file: {path} ({e})")
+                    continue
+
+                logger.info(f"Importing user settings: {path}")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO user_settings (config_key, name, value) VALUES (?, ?, ?)",
+                    [(path.stem, name, json.dumps(value)) for name, value in settings.values.items()],
+                )
+
+    def get_last_sync(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM last_sync WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            return -1
+
+        return row[0]
+
+    def set_last_sync(self, key: str, value: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO last_sync (key, value) VALUES (?, ?)",
+                (key, value),
+            )
+
+    def get_user_setting(self, config_key: str, name: str, default_value=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM user_settings WHERE config_key = ? AND name = ?",
+                (config_key, name),
+            ).fetchone()
+
+        if row is None:
+            return default_value
+
+        return json.loads(row[0])
+
+    def set_user_setting(self, config_key: str, name: str, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_settings (config_key, name, value) VALUES (?, ?, ?)",
+                (config_key, name, json.dumps(value)),
+            )
+
+    def add_sync_history(self, config_key: str, kind: str, started_at: float, duration: float, size: int,
+                         changed: bool = True):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO sync_history (config_key, kind, started_at, duration, size, changed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (config_key, kind, started_at, duration, size, int(changed)),
+            )
+
+    def get_sync_history(self, config_key: str, limit: int = 20) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, started_at, duration, size, changed FROM sync_history "
+                "WHERE config_key = ? ORDER BY started_at DESC LIMIT ?",
+                (config_key, limit),
+            ).fetchall()
+
+        return [
+            dict(kind=kind, started_at=started_at, duration=duration, size=size, changed=bool(changed))
+            for kind, started_at, duration, size, changed in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_state_store: StateStore | None = None
+_state_store_lock = threading.Lock()
+
+
+def get_state_store() -> StateStore:
+    global _state_store
+
+    with _state_store_lock:
+        if _state_store is None:
+            _state_store = StateStore(state_path)
+
+        return _state_store